@@ -22,3 +22,8 @@ db.users.insertMany([
     active: false,
   },
 ]);
+
+db.users.createIndex({ username: 1 }, { unique: true });
+db.users.createIndex({ "profile.city": 1 });
+db.users.createIndex({ "profile.city": 1, active: 1 });
+db.users.createIndex({ "profile.city": 1, _id: 1 });
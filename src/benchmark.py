@@ -0,0 +1,509 @@
+from __future__ import annotations
+
+import argparse
+import json
+from abc import ABC, abstractmethod
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from pymongo import MongoClient
+from sqlalchemy import Select, create_engine, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from src import mongo_mongoengine, mongo_pymongo
+from src.mongo_indexes import ensure_indexes
+from src.orm_models import Base, User
+from src.sql_instrumentation import percentile
+
+CITIES = ["Berlin", "Bremen", "Hamburg", "Munich", "Cologne", "Leipzig"]
+AGE_MIN, AGE_MAX = 18, 80
+UPDATE_RATIO = 0.8
+# Synthetic usernames share this prefix so a real mongod is only cleaned of
+# benchmark rows, never of application users.
+PREFIX = "bench_user"
+
+BACKENDS = ("sql", "pymongo", "mongoengine", "file")
+
+UserDict = Dict[str, Any]
+
+
+def make_users(n: int, start: int = 0, seed: int = 42) -> List[UserDict]:
+    """Synthetic users in the bulk_create_users input shape."""
+    rnd = random.Random(seed + start)
+    return [
+        {
+            "username": f"{PREFIX}{i}",
+            "email": f"{PREFIX}{i}@example.com",
+            "full_name": f"User {i}",
+            "age": rnd.randint(AGE_MIN, AGE_MAX),
+            "city": rnd.choice(CITIES),
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def age_band(city: str) -> Tuple[int, int]:
+    """Equal slice of the age range standing in for ``city`` in SQL."""
+    i, span = CITIES.index(city), AGE_MAX - AGE_MIN + 1
+    lo = AGE_MIN + i * span // len(CITIES)
+    hi = AGE_MIN + (i + 1) * span // len(CITIES) - 1
+    return lo, hi
+
+
+class Backend(ABC):
+    """One user store under test.
+
+    Methods must be safe to call from threads unless ``thread_safe`` is
+    False, in which case run() serialises them behind one lock. A new
+    instance must start from an empty store and close() must leave none of
+    its rows behind, since each backend is built twice per run. ``notes``
+    is copied into the report to explain phases that differ per backend.
+    """
+
+    name = "base"
+    thread_safe = True
+    notes: Dict[str, str] = {}
+
+    def load(self, users: List[UserDict]) -> None:
+        self.bulk_insert(users)
+
+    @abstractmethod
+    def lookup(self, username: str) -> Any: ...
+
+    @abstractmethod
+    def city_scan(self, city: str) -> int: ...
+
+    @abstractmethod
+    def bulk_insert(self, users: List[UserDict]) -> None: ...
+
+    @abstractmethod
+    def update(self, username: str, city: str, age: int) -> None: ...
+
+    def close(self) -> None:
+        pass
+
+
+class SqlBackend(Backend):
+    """SQLite file database through the same ORM model as src.main."""
+
+    name = "sql"
+    notes = {
+        "city_scan": "no city column in SQL; scans the age_band() of each city",
+    }
+
+    def __init__(self, workdir: Path) -> None:
+        self.path = workdir / "bench.db"
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def lookup(self, username: str) -> Any:
+        # Same query as src.main.get_user_by_name; importing src.main would
+        # create the MySQL engine of src.db_setup.
+        with self.Session() as db:
+            return db.execute(
+                select(User).where(User.username == username)
+            ).scalar_one_or_none()
+
+    def city_scan(self, city: str) -> int:
+        lo, hi = age_band(city)
+        with self.Session() as db:
+            stmt: Select = select(User.username)
+            stmt = stmt.where(User.age.between(lo, hi))
+            return len(db.execute(stmt).all())
+
+    def bulk_insert(self, users: List[UserDict]) -> None:
+        rows = [
+            {"username": u["username"], "email": u["email"], "age": u["age"]}
+            for u in users
+        ]
+        with self.Session() as db:
+            db.execute(insert(User), rows)
+            db.commit()
+
+    def update(self, username: str, city: str, age: int) -> None:
+        # Same statement as src.main.update_user_age, without its printing.
+        with self.Session() as db:
+            db.execute(update(User).where(User.username == username).values(age=age))
+            db.commit()
+
+    def close(self) -> None:
+        self.engine.dispose()
+        self.path.unlink(missing_ok=True)
+
+
+def _mongo_client(uri: Optional[str]) -> MongoClient:
+    if uri:
+        return MongoClient(uri, serverSelectionTimeoutMS=2000)
+    import mongomock
+
+    return mongomock.MongoClient()
+
+
+class PymongoBackend(Backend):
+    """mongo_pymongo functions bound to mongomock or a local mongod."""
+
+    name = "pymongo"
+
+    def __init__(self, uri: Optional[str]) -> None:
+        # mongomock is not thread-safe.
+        self.thread_safe = bool(uri)
+        self._saved_client = mongo_pymongo._client
+        mongo_pymongo._client = _mongo_client(uri)
+        self.coll = mongo_pymongo.users()
+        self._clean()
+        ensure_indexes(self.coll)
+
+    def lookup(self, username: str) -> Any:
+        return mongo_pymongo.get_user(username)
+
+    def city_scan(self, city: str) -> int:
+        return sum(1 for _ in mongo_pymongo.iter_users_in_city(city))
+
+    def bulk_insert(self, users: List[UserDict]) -> None:
+        # Synthetic users are new, so plain InsertOne batches; this also keeps
+        # mongomock usable, which rejects UpdateOne from pymongo>=4.11.
+        mongo_pymongo.bulk_create_users(users, upsert=False, collection=self.coll)
+
+    def update(self, username: str, city: str, age: int) -> None:
+        mongo_pymongo.update_city(username, city)
+
+    def _clean(self) -> None:
+        self.coll.delete_many({"username": {"$regex": f"^{PREFIX}"}})
+
+    def close(self) -> None:
+        self._clean()
+        mongo_pymongo.client().close()
+        mongo_pymongo._client = self._saved_client
+
+
+class MongoengineBackend(Backend):
+    """mongo_mongoengine functions on their own connection."""
+
+    name = "mongoengine"
+
+    def __init__(self, uri: Optional[str]) -> None:
+        from mongoengine import connect, disconnect
+
+        self.thread_safe = bool(uri)
+        disconnect(alias="default")
+        if uri:
+            connect(host=uri, alias="default")
+        else:
+            import mongomock
+
+            connect(
+                "bench",
+                host="mongodb://localhost",
+                alias="default",
+                mongo_client_class=mongomock.MongoClient,
+            )
+        self._clean()
+        mongo_mongoengine.User.ensure_indexes()
+
+    def lookup(self, username: str) -> Any:
+        return mongo_mongoengine.get_user(username)
+
+    def city_scan(self, city: str) -> int:
+        return sum(1 for _ in mongo_mongoengine.iter_users_in_city(city))
+
+    def bulk_insert(self, users: List[UserDict]) -> None:
+        User = mongo_mongoengine.User
+        Profile = mongo_mongoengine.Profile
+        User.objects.insert(
+            [
+                User(
+                    username=u["username"],
+                    email=u["email"],
+                    profile=Profile(
+                        full_name=u["full_name"], age=u["age"], city=u["city"]
+                    ),
+                )
+                for u in users
+            ],
+            load_bulk=False,
+        )
+
+    def update(self, username: str, city: str, age: int) -> None:
+        mongo_mongoengine.update_city(username, city)
+
+    def _clean(self) -> None:
+        mongo_mongoengine.User.objects(username__startswith=PREFIX).delete()
+
+    def close(self) -> None:
+        from mongoengine import disconnect
+
+        self._clean()
+        disconnect(alias="default")
+
+
+class FileBackend(Backend):
+    """CSV file read into a pandas DataFrame indexed by username.
+
+    pandas is not thread-safe, so every operation holds one lock; concurrency
+    only shows the cost of that serialisation.
+    """
+
+    name = "file"
+
+    def __init__(self, workdir: Path) -> None:
+        self.path = workdir / "bench_users.csv"
+        self.df = pd.DataFrame()
+        self.lock = threading.Lock()
+
+    def load(self, users: List[UserDict]) -> None:
+        pd.DataFrame(users).to_csv(self.path, index=False)
+        self.df = pd.read_csv(self.path).set_index("username")
+
+    def lookup(self, username: str) -> Any:
+        with self.lock:
+            if username not in self.df.index:
+                return None
+            return self.df.loc[username].to_dict()
+
+    def city_scan(self, city: str) -> int:
+        with self.lock:
+            return int((self.df["city"] == city).sum())
+
+    def bulk_insert(self, users: List[UserDict]) -> None:
+        new = pd.DataFrame(users)
+        with self.lock:
+            new.to_csv(self.path, mode="a", header=False, index=False)
+            self.df = pd.concat([self.df, new.set_index("username")])
+
+    def update(self, username: str, city: str, age: int) -> None:
+        with self.lock:
+            self.df.loc[username, "city"] = city
+
+    def close(self) -> None:
+        self.df.reset_index().to_csv(self.path, index=False)
+
+
+class _Serialized(Backend):
+    """Wrap a backend that is not thread-safe so one call runs at a time."""
+
+    def __init__(self, inner: Backend) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.notes = inner.notes
+        self.lock = threading.Lock()
+
+    def load(self, users: List[UserDict]) -> None:
+        with self.lock:
+            self.inner.load(users)
+
+    def lookup(self, username: str) -> Any:
+        with self.lock:
+            return self.inner.lookup(username)
+
+    def city_scan(self, city: str) -> int:
+        with self.lock:
+            return self.inner.city_scan(city)
+
+    def bulk_insert(self, users: List[UserDict]) -> None:
+        with self.lock:
+            self.inner.bulk_insert(users)
+
+    def update(self, username: str, city: str, age: int) -> None:
+        with self.lock:
+            self.inner.update(username, city, age)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def _execute(
+    ops: List[Callable[[], Any]],
+    concurrency: int,
+    fn: Callable[[Callable[[], Any]], Any],
+) -> None:
+    if concurrency <= 1:
+        for op in ops:
+            fn(op)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(fn, ops))
+
+
+def _run(ops: List[Callable[[], Any]], concurrency: int) -> Dict[str, Any]:
+    """Execute ``ops`` on a thread pool; report throughput and latencies."""
+    latencies: List[float] = []
+
+    def timed(op: Callable[[], Any]) -> None:
+        t0 = time.perf_counter()
+        op()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    start = time.perf_counter()
+    _execute(ops, concurrency, timed)
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        "ops": len(ops),
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(len(ops) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+    }
+
+
+def _trace(ops: List[Callable[[], Any]], concurrency: int) -> Dict[str, Any]:
+    """Execute ``ops`` under tracemalloc; report the Python heap peak only."""
+    tracemalloc.reset_peak()
+    _execute(ops, concurrency, lambda op: op())
+    _, peak = tracemalloc.get_traced_memory()
+    return {"peak_mem_bytes": peak}
+
+
+def run_workload(
+    backend: Backend,
+    n_users: int,
+    n_ops: int,
+    concurrency: int,
+    bulk_size: int,
+    seed: int = 42,
+    phase: Callable[[List[Callable[[], Any]], int], Dict[str, Any]] = _run,
+) -> Dict[str, Any]:
+    """Run every workload phase through ``phase`` (_run or _trace)."""
+    rnd = random.Random(seed)
+    users = make_users(n_users, seed=seed)
+    names = [u["username"] for u in users]
+
+    results: Dict[str, Any] = {}
+    results["load"] = phase([partial(backend.load, users)], 1)
+    results["point_lookup"] = phase(
+        [partial(backend.lookup, rnd.choice(names)) for _ in range(n_ops)],
+        concurrency,
+    )
+    results["city_scan"] = phase(
+        [partial(backend.city_scan, c) for c in CITIES], concurrency
+    )
+    extra = make_users(bulk_size * concurrency, start=n_users, seed=seed)
+    results["bulk_insert"] = phase(
+        [
+            partial(backend.bulk_insert, extra[i : i + bulk_size])
+            for i in range(0, len(extra), bulk_size)
+        ],
+        concurrency,
+    )
+
+    mix: List[Callable[[], Any]] = []
+    for _ in range(n_ops):
+        name = rnd.choice(names)
+        if rnd.random() < UPDATE_RATIO:
+            city, age = rnd.choice(CITIES), rnd.randint(AGE_MIN, AGE_MAX)
+            mix.append(partial(backend.update, name, city, age))
+        else:
+            mix.append(partial(backend.lookup, name))
+    results["update_mix"] = phase(mix, concurrency)
+    return results
+
+
+def run(
+    backends: List[str],
+    n_users: int = 10_000,
+    n_ops: int = 2_000,
+    concurrency: int = 4,
+    bulk_size: int = 500,
+    mongo_uri: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Benchmark each backend with the same workload; return one report."""
+    report: Dict[str, Any] = {
+        "config": {
+            "n_users": n_users,
+            "n_ops": n_ops,
+            "concurrency": concurrency,
+            "bulk_size": bulk_size,
+            "mongo": mongo_uri or "mongomock",
+            "serialized": [],
+        },
+        "backends": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        factories: Dict[str, Callable[[], Backend]] = {
+            "sql": lambda: SqlBackend(workdir),
+            "pymongo": lambda: PymongoBackend(mongo_uri),
+            "mongoengine": lambda: MongoengineBackend(mongo_uri),
+            "file": lambda: FileBackend(workdir),
+        }
+
+        def make(name: str) -> Backend:
+            backend = factories[name]()
+            if backend.thread_safe:
+                return backend
+            if name not in report["config"]["serialized"]:
+                report["config"]["serialized"].append(name)
+            return _Serialized(backend)
+
+        for name in backends:
+            # tracemalloc slows Python-heavy backends far more than SQLite's
+            # C code, so timings and memory come from two separate passes.
+            backend = make(name)
+            try:
+                timed = run_workload(backend, n_users, n_ops, concurrency, bulk_size)
+            finally:
+                backend.close()
+
+            backend = make(name)
+            tracemalloc.start()
+            try:
+                traced = run_workload(
+                    backend, n_users, n_ops, concurrency, bulk_size, phase=_trace
+                )
+            finally:
+                tracemalloc.stop()
+                backend.close()
+
+            for key, stats in timed.items():
+                stats.update(traced[key])
+            if backend.notes:
+                timed["notes"] = dict(backend.notes)
+            report["backends"][name] = timed
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="User store benchmark")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=BACKENDS,
+        default=list(BACKENDS),
+        metavar="BACKEND",
+        help=f"one or more of: {', '.join(BACKENDS)}",
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--bulk-size", type=int, default=500)
+    parser.add_argument("--mongo-uri", help="use a real mongod instead of mongomock")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(
+        args.backends,
+        n_users=args.users,
+        n_ops=args.ops,
+        concurrency=args.concurrency,
+        bulk_size=args.bulk_size,
+        mongo_uri=args.mongo_uri,
+    )
+    out = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(out, encoding="utf-8")
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
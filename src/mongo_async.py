@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import DuplicateKeyError
+
+from src.mongo_pymongo import CITY_PROJECTION, MONGO_URI, user_doc
+from src.mongo_queries import by_username, in_city
+
+MAX_POOL_SIZE = 100
+FANOUT_LIMIT = 50
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_client: Optional[AsyncMongoClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def client(max_pool_size: int = MAX_POOL_SIZE) -> AsyncMongoClient:
+    """Get (and cache) an AsyncMongoClient for the running event loop.
+
+    The client belongs to the loop that created it. A client left behind by
+    a loop that has since closed (e.g. a previous ``asyncio.run``) is
+    replaced; using it from another live loop is an error. ``max_pool_size``
+    only applies when the client is created.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is not loop:
+        if _client_loop is not None and not _client_loop.is_closed():
+            raise RuntimeError("async Mongo client is bound to another event loop")
+        _client = None
+    if _client is None:
+        _client = AsyncMongoClient(
+            MONGO_URI,
+            serverSelectionTimeoutMS=2000,
+            maxPoolSize=max_pool_size,
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client; the next client() call opens a new one."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.close()
+        _client = None
+        _client_loop = None
+
+
+def db() -> AsyncDatabase:
+    return client().get_database("appdb")
+
+
+def users() -> AsyncCollection:
+    return db().get_collection("users")
+
+
+async def create_user(
+    username: str,
+    email: str,
+    full_name: str,
+    age: int,
+    city: str,
+) -> str:
+    """Insert a user; if duplicate username, reuse existing _id."""
+    doc = user_doc(username, email, full_name, age, city)
+    try:
+        res = await users().insert_one(doc)
+        return str(res.inserted_id)
+    except DuplicateKeyError:
+        found = await users().find_one(by_username(username), {"_id": 1})
+        if found and "_id" in found:
+            return str(found["_id"])
+        raise
+
+
+async def get_user(username: str) -> Optional[Dict[str, Any]]:
+    return await users().find_one(by_username(username), {"_id": 0})
+
+
+async def find_users_in_city(city: str) -> List[Dict[str, Any]]:
+    cur = users().find(in_city(city), CITY_PROJECTION)
+    return await cur.to_list()
+
+
+async def add_tag(username: str, tag: str) -> int:
+    res = await users().update_one(by_username(username), {"$addToSet": {"tags": tag}})
+    return int(res.modified_count)
+
+
+async def update_city(username: str, new_city: str) -> int:
+    res = await users().update_one(
+        by_username(username),
+        {"$set": {"profile.city": new_city}},
+    )
+    return int(res.modified_count)
+
+
+async def deactivate_user(username: str) -> int:
+    res = await users().update_one(
+        by_username(username),
+        {"$set": {"active": False}},
+    )
+    return int(res.modified_count)
+
+
+async def gather_bounded(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    limit: int = FANOUT_LIMIT,
+) -> List[R]:
+    """Run ``fn`` over ``items`` with ``limit`` worker tasks.
+
+    Items are fed through a queue of size ``limit``, so only ``limit`` calls
+    and queued items exist at a time however long ``items`` is. Results keep
+    the input order. The first exception cancels the remaining work. Keep
+    ``limit`` at or below the pool size, otherwise extra calls only queue for
+    a connection.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    queue: asyncio.Queue[Optional[tuple[int, T]]] = asyncio.Queue(maxsize=limit)
+    results: List[Any] = []
+
+    async def produce() -> None:
+        for i, item in enumerate(items):
+            results.append(None)
+            await queue.put((i, item))
+        for _ in range(limit):
+            await queue.put(None)
+
+    async def work() -> None:
+        while (job := await queue.get()) is not None:
+            i, item = job
+            results[i] = await fn(item)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(work()) for _ in range(limit)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for t in tasks:
+            t.cancel()
+    return results
+
+
+async def _bench_async(names: List[str], concurrency: int) -> float:
+    try:
+        client(max_pool_size=concurrency)
+        start = time.perf_counter()
+        await gather_bounded(get_user, names, concurrency)
+        return time.perf_counter() - start
+    finally:
+        await close_client()
+
+
+def _bench_threads(names: List[str], concurrency: int) -> float:
+    from src import mongo_pymongo
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(mongo_pymongo.get_user, names))
+    return time.perf_counter() - start
+
+
+def benchmark(
+    n: int = 10_000, concurrency: int = FANOUT_LIMIT
+) -> Dict[str, Dict[str, float]]:
+    """Compare point lookups: async fan-out vs MongoClient in a thread pool."""
+    names = [("alice", "bob")[i % 2] for i in range(n)]
+    report: Dict[str, Dict[str, float]] = {}
+    for label, elapsed in (
+        ("async", asyncio.run(_bench_async(names, concurrency))),
+        ("pymongo_threads", _bench_threads(names, concurrency)),
+    ):
+        report[label] = {
+            "seconds": round(elapsed, 3),
+            "ops_per_sec": round(n / elapsed, 1) if elapsed else 0.0,
+        }
+    return report
+
+
+async def _demo() -> None:
+    try:
+        pong = await db().command("ping")
+        print("ping ok:", bool(pong.get("ok", 0)))
+        print("alice:", await get_user("alice"))
+        print("city Berlin:", await find_users_in_city("Berlin"))
+        print("lookups:", await gather_bounded(get_user, ["alice", "bob"], limit=2))
+    finally:
+        await close_client()
+
+
+def main() -> None:
+    asyncio.run(_demo())
+    for label, stats in benchmark(n=2000, concurrency=20).items():
+        print(f"{label}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
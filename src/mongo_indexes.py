@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.collection import Collection
+
+from src.mongo_queries import Filter, after_id, by_username, by_usernames, in_city
+
+# Default index names are kept so mongoengine's ``unique=True`` on
+# User.username and its meta["indexes"] resolve to the same indexes.
+REQUIRED_INDEXES: List[IndexModel] = [
+    IndexModel([("username", ASCENDING)], unique=True),
+    IndexModel([("profile.city", ASCENDING)]),
+    IndexModel([("profile.city", ASCENDING), ("active", ASCENDING)]),
+    # Keyset pages of one city (iter_user_pages) walk this in _id order.
+    IndexModel([("profile.city", ASCENDING), ("_id", ASCENDING)]),
+]
+
+
+class QueryShape(NamedTuple):
+    filter: Filter
+    sort: Optional[List[Any]] = None
+
+
+# Every users query, built with the same mongo_queries builders the
+# data-access code calls (mongo_pymongo, mongo_async, mongo_mutations,
+# sql_mongo_sync); update_one calls are explained as the equivalent find.
+QUERY_SHAPES: Dict[str, QueryShape] = {
+    "get_user / add_tag / update_city / deactivate_user": QueryShape(
+        by_username("alice")
+    ),
+    "find_users_in_city / iter_users_in_city": QueryShape(in_city("Berlin")),
+    "iter_user_pages(in_city)": QueryShape(
+        after_id(in_city("Berlin"), ObjectId()), [("_id", ASCENDING)]
+    ),
+    "bulk_create_users(resolve) / MutationBatcher.flush": QueryShape(
+        by_usernames(["alice", "bob"])
+    ),
+}
+
+
+def ensure_indexes(coll: Collection) -> List[str]:
+    """Create the required indexes; existing identical indexes are a no-op."""
+    return list(coll.create_indexes(REQUIRED_INDEXES))
+
+
+def plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Collect every stage name of an explain() plan tree."""
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def verify_query_plans(coll: Collection) -> Dict[str, List[str]]:
+    """Explain each query shape and return its winning-plan stages."""
+    out: Dict[str, List[str]] = {}
+    for name, shape in QUERY_SHAPES.items():
+        cur = coll.find(shape.filter)
+        if shape.sort:
+            cur = cur.sort(shape.sort)
+        explained = cur.explain()
+        out[name] = plan_stages(explained["queryPlanner"]["winningPlan"])
+    return out
+
+
+def collscans(plans: Dict[str, List[str]]) -> List[str]:
+    return [name for name, stages in plans.items() if "COLLSCAN" in stages]
+
+
+def main() -> None:
+    from src.mongo_pymongo import users
+
+    coll = users()
+    print("indexes:", ensure_indexes(coll))
+
+    plans = verify_query_plans(coll)
+    for name, stages in plans.items():
+        print(f"{name}: {' <- '.join(stages)}")
+
+    bad = collscans(plans)
+    if bad:
+        print("COLLSCAN in:", ", ".join(bad))
+        sys.exit(1)
+    print("no COLLSCAN")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+from src.mongo_queries import by_username, by_usernames
+
+MAX_BATCH_USERS = 1000
+MAX_DELAY_S = 1.0
+
+_MISSING = object()
+# Fields a batched mutation can change, read to report per-user counts.
+_STATE_PROJECTION = {"_id": 0, "username": 1, "tags": 1, "profile.city": 1, "active": 1}
+
+
+@dataclass
+class _Pending:
+    tags: List[str] = field(default_factory=list)
+    sets: Dict[str, Any] = field(default_factory=dict)
+
+    def update_doc(self) -> Dict[str, Any]:
+        doc: Dict[str, Any] = {}
+        if self.tags:
+            doc["$addToSet"] = {"tags": {"$each": list(self.tags)}}
+        if self.sets:
+            doc["$set"] = dict(self.sets)
+        return doc
+
+    def changes(self, current: Dict[str, Any]) -> bool:
+        """Whether applying this update to ``current`` would modify it."""
+        have = current.get("tags") or []
+        if any(t not in have for t in self.tags):
+            return True
+        return any(_get_path(current, k) != v for k, v in self.sets.items())
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    cur: Any = doc
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return _MISSING
+        cur = cur[part]
+    return cur
+
+
+class MutationBatcher:
+    """Collect per-user tag/profile updates and flush them with bulk_write.
+
+    All updates for one username are merged into a single update document
+    ($addToSet with $each, later $set values win). A flush happens when
+    ``max_batch_users`` users are pending or ``max_delay_s`` has passed since
+    the first pending update (checked on each call), and on exit.
+
+    Every pending update is sent, so concurrent writers cannot cause one to
+    be dropped. bulk_write only reports aggregate counts, so the per-user
+    results (1 if the merged update changes the document, 0 if it is missing
+    or already up to date, like add_tag/update_city/deactivate_user) are
+    computed from one ``$in`` read taken just before the write; a concurrent
+    writer in between can make them stale. Results are passed to
+    ``on_flush`` if given, otherwise summed into ``modified``.
+    """
+
+    def __init__(
+        self,
+        collection: Optional[Collection] = None,
+        max_batch_users: int = MAX_BATCH_USERS,
+        max_delay_s: float = MAX_DELAY_S,
+        on_flush: Optional[Callable[[Dict[str, int]], None]] = None,
+    ) -> None:
+        if max_batch_users <= 0:
+            raise ValueError("max_batch_users must be positive")
+        if collection is None:
+            from src.mongo_pymongo import users
+
+            collection = users()
+        self.collection = collection
+        self.max_batch_users = max_batch_users
+        self.max_delay_s = max_delay_s
+        self.on_flush = on_flush
+        self.modified: Dict[str, int] = {}
+        self._pending: Dict[str, _Pending] = {}
+        self._first_at: Optional[float] = None
+
+    def __enter__(self) -> "MutationBatcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.flush()
+
+    def _entry(self, username: str) -> _Pending:
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+        entry = self._pending.get(username)
+        if entry is None:
+            entry = self._pending[username] = _Pending()
+        return entry
+
+    def _maybe_flush(self) -> None:
+        if len(self._pending) >= self.max_batch_users:
+            self.flush()
+        elif (
+            self._first_at is not None
+            and time.monotonic() - self._first_at >= self.max_delay_s
+        ):
+            self.flush()
+
+    def add_tag(self, username: str, tag: str) -> None:
+        entry = self._entry(username)
+        if tag not in entry.tags:
+            entry.tags.append(tag)
+        self._maybe_flush()
+
+    def update_city(self, username: str, new_city: str) -> None:
+        self._entry(username).sets["profile.city"] = new_city
+        self._maybe_flush()
+
+    def deactivate_user(self, username: str) -> None:
+        self._entry(username).sets["active"] = False
+        self._maybe_flush()
+
+    def flush(self) -> Dict[str, int]:
+        """Write all pending updates and return per-user modified counts.
+
+        If the read or the bulk_write fails, the pending updates are put back
+        (merged with anything queued since) and the error is re-raised with
+        the affected usernames attached as a note; nothing is counted. The
+        updates are idempotent, so a retried flush is safe even after a
+        partially applied unordered batch.
+        """
+        pending, self._pending = self._pending, {}
+        first_at, self._first_at = self._first_at, None
+        if not pending:
+            return {}
+
+        try:
+            current = {
+                d["username"]: d
+                for d in self.collection.find(
+                    by_usernames(pending),
+                    _STATE_PROJECTION,
+                )
+            }
+            self.collection.bulk_write(
+                [UpdateOne(by_username(n), e.update_doc()) for n, e in pending.items()],
+                ordered=False,
+            )
+        except Exception as e:
+            self._requeue(pending, first_at)
+            e.add_note(f"unapplied mutations for {len(pending)} users: {list(pending)}")
+            raise
+
+        result = {
+            name: int(name in current and entry.changes(current[name]))
+            for name, entry in pending.items()
+        }
+        if self.on_flush is not None:
+            self.on_flush(result)
+        else:
+            for name, n in result.items():
+                self.modified[name] = self.modified.get(name, 0) + n
+        return result
+
+    def _requeue(self, pending: Dict[str, _Pending], first_at: Optional[float]) -> None:
+        for name, entry in pending.items():
+            newer = self._pending.get(name)
+            if newer is not None:
+                entry.tags.extend(t for t in newer.tags if t not in entry.tags)
+                entry.sets.update(newer.sets)
+        self._pending = {**self._pending, **pending}
+        if first_at is not None:
+            self._first_at = first_at
+
+
+def main() -> None:
+    with MutationBatcher(max_batch_users=500) as batcher:
+        batcher.add_tag("alice", "pro")
+        batcher.add_tag("alice", "beta")
+        batcher.update_city("alice", "Cologne")
+        batcher.add_tag("bob", "pro")
+        batcher.deactivate_user("bob")
+    print("modified:", batcher.modified)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+from bson import ObjectId
+
+# Filters shared by the users data-access functions and by the COLLSCAN
+# check in mongo_indexes, so the check explains exactly what is sent.
+
+Filter = Dict[str, Any]
+
+
+def by_username(username: str) -> Filter:
+    return {"username": username}
+
+
+def by_usernames(usernames: Iterable[str]) -> Filter:
+    return {"username": {"$in": list(usernames)}}
+
+
+def in_city(city: str) -> Filter:
+    return {"profile.city": city}
+
+
+def after_id(query: Optional[Filter], last_id: Optional[ObjectId]) -> Filter:
+    """Add the ``_id > last_id`` range of a keyset page to ``query``.
+
+    An ``_id`` condition already in ``query`` is kept and ANDed with the range.
+    """
+    flt = dict(query or {})
+    if last_id is None:
+        return flt
+    if "_id" in flt:
+        return {"$and": [flt, {"_id": {"$gt": last_id}}]}
+    flt["_id"] = {"$gt": last_id}
+    return flt
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, TIMESTAMP, func
+from sqlalchemy import Column, Index, Integer, String, TIMESTAMP, func
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -8,6 +8,8 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "users"
+    # Keyset order of sql_mongo_sync with mark="created_at".
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), nullable=False, unique=True)
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = 200.0
+N_PLUS_ONE_THRESHOLD = 10
+MAX_SAMPLES = 1024
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+BUCKETS_MS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+
+_START_KEY = "_instr_start"
+_SESSION_KEY = "_instr_session_counts"
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so that queries differing only in values match."""
+    s = _STRING_RE.sub("?", statement)
+    s = _NUMBER_RE.sub("?", s)
+    s = _PARAM_RE.sub("?", s)
+    s = _IN_LIST_RE.sub("IN (?)", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+def redact(parameters: Any) -> Any:
+    """Replace bind parameter values by their type names."""
+    if isinstance(parameters, dict):
+        return {k: f"<{type(v).__name__}>" for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(p) for p in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    last = len(sorted_values) - 1
+    idx = min(last, int(round(q / 100.0 * last)))
+    return sorted_values[idx]
+
+
+@dataclass
+class QueryStats:
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    slow: int = 0
+    errors: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=MAX_SAMPLES))
+
+    def record(
+        self, elapsed_ms: float, rowcount: int, is_slow: bool, failed: bool = False
+    ) -> None:
+        self.count += 1
+        if failed:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if rowcount > 0:
+            self.rows += rowcount
+        if is_slow:
+            self.slow += 1
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.samples.append(elapsed_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "statement": self.statement,
+            "count": self.count,
+            "rows": self.rows,
+            "slow": self.slow,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "percentile_window": len(ordered),
+            "histogram": {
+                **{f"le_{b:g}ms": n for b, n in zip(BUCKETS_MS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class QueryInstrumentation:
+    """Aggregate SQL statement metrics from SQLAlchemy cursor events.
+
+    Rows are taken from ``cursor.rowcount``; drivers that report -1 for
+    SELECT (e.g. sqlite3) contribute no row counts. Failed statements
+    (lock-wait timeouts, deadlocks, ...) are timed through ``handle_error``
+    and counted under ``errors``. count, histogram and max cover all
+    executions, while p50/p95/p99 are taken over the last ``MAX_SAMPLES``
+    (reported as ``percentile_window``).
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: float = SLOW_QUERY_MS,
+        n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD,
+    ) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._stats: Dict[str, QueryStats] = {}
+        self._n_plus_one: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._engines: List[Engine] = []
+
+    def install(self, engine: Engine) -> "QueryInstrumentation":
+        """Attach cursor and session listeners for ``engine``."""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+        event.listen(engine, "checkin", self._checkin)
+        if not event.contains(Session, "after_begin", self._bind_session):
+            event.listen(Session, "after_begin", self._bind_session)
+        self._engines.append(engine)
+        return self
+
+    def uninstall(self) -> None:
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._before)
+            event.remove(engine, "after_cursor_execute", self._after)
+            event.remove(engine, "handle_error", self._error)
+            event.remove(engine, "checkin", self._checkin)
+        self._engines.clear()
+        if event.contains(Session, "after_begin", self._bind_session):
+            event.remove(Session, "after_begin", self._bind_session)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._n_plus_one.clear()
+
+    def _before(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    def _after(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        rowcount = getattr(cursor, "rowcount", -1) or 0
+        key = self._record(conn, statement, parameters, rowcount, None)
+        if key is None:
+            return
+
+        session_counts: Optional[Dict[str, int]] = conn.info.get(_SESSION_KEY)
+        if session_counts is not None and key.upper().startswith("SELECT"):
+            n = session_counts[key] = session_counts.get(key, 0) + 1
+            if n == self.n_plus_one_threshold:
+                logger.warning("possible N+1: %d x %s", n, key)
+                with self._lock:
+                    self._n_plus_one.append({"statement": key, "count": n})
+
+    def _error(self, ctx: Any) -> None:
+        """Record statements that raised; they never reach after_cursor_execute."""
+        if ctx.connection is None or ctx.statement is None:
+            return
+        self._record(
+            ctx.connection, ctx.statement, ctx.parameters, -1, ctx.original_exception
+        )
+
+    def _record(
+        self,
+        conn: Connection,
+        statement: str,
+        parameters: Any,
+        rowcount: int,
+        error: Optional[BaseException],
+    ) -> Optional[str]:
+        starts = conn.info.get(_START_KEY)
+        if not starts:
+            return None
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+        key = fingerprint(statement)
+        is_slow = elapsed_ms >= self.slow_query_ms
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(key)
+            stats.record(elapsed_ms, rowcount, is_slow, failed=error is not None)
+
+        if error is not None:
+            logger.warning(
+                "failed query (%.1f ms, %s): %s params=%s",
+                elapsed_ms,
+                type(error).__name__,
+                statement,
+                redact(parameters),
+            )
+        elif is_slow:
+            logger.warning(
+                "slow query (%.1f ms): %s params=%s",
+                elapsed_ms,
+                statement,
+                redact(parameters),
+            )
+        return key
+
+    def _bind_session(
+        self, session: Session, transaction: SessionTransaction, connection: Connection
+    ) -> None:
+        """Share the session's per-statement counters with its connection."""
+        counts = session.info.setdefault(_SESSION_KEY, {})
+        connection.info[_SESSION_KEY] = counts
+
+    def _checkin(self, dbapi_connection: Any, connection_record: Any) -> None:
+        connection_record.info.pop(_SESSION_KEY, None)
+        connection_record.info.pop(_START_KEY, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return aggregated metrics, hottest statements (by total time) first."""
+        with self._lock:
+            queries = sorted(
+                (s.to_dict() for s in self._stats.values()),
+                key=lambda d: d["total_ms"],
+                reverse=True,
+            )
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "queries": queries,
+                "n_plus_one": list(self._n_plus_one),
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+
+def instrument(
+    engine: Engine,
+    slow_query_ms: float = SLOW_QUERY_MS,
+    n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD,
+) -> QueryInstrumentation:
+    """Create a QueryInstrumentation and install it on ``engine``."""
+    return QueryInstrumentation(slow_query_ms, n_plus_one_threshold).install(engine)
+
+
+def main() -> None:
+    from src.db_setup import SessionLocal, engine
+    from src.main import get_all_users, get_user_by_name
+
+    logging.basicConfig(level=logging.INFO)
+    instr = instrument(engine, slow_query_ms=50.0)
+
+    db = SessionLocal()
+    for u in get_all_users(db):
+        get_user_by_name(db, str(u.username))
+    db.close()
+
+    print(instr.to_json())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Sequence
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from sqlalchemy import Row, Select, select, tuple_
+from sqlalchemy.orm import Session
+
+from src.mongo_queries import by_username
+from src.orm_models import User
+
+SYNC_ID = "users_sql_to_mongo"
+SYNC_BATCH_SIZE = 5000
+
+
+@dataclass
+class Checkpoint:
+    """High-water mark of the last synced row (ordered by ``mark``, then id)."""
+
+    mark: str = "id"
+    last_id: int = 0
+    last_created_at: Optional[datetime] = None
+
+
+@dataclass
+class SyncStats:
+    rows: int = 0
+    upserted: int = 0
+    modified: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+
+def load_checkpoint(
+    checkpoints: Collection, mark: str = "id", sync_id: str = SYNC_ID
+) -> Checkpoint:
+    doc = checkpoints.find_one({"_id": sync_id})
+    if not doc or doc.get("mark") != mark:
+        return Checkpoint(mark=mark)
+    return Checkpoint(
+        mark=mark,
+        last_id=int(doc.get("last_id", 0)),
+        last_created_at=doc.get("last_created_at"),
+    )
+
+
+def save_checkpoint(
+    checkpoints: Collection, cp: Checkpoint, sync_id: str = SYNC_ID
+) -> None:
+    checkpoints.replace_one(
+        {"_id": sync_id},
+        {
+            "_id": sync_id,
+            "mark": cp.mark,
+            "last_id": cp.last_id,
+            "last_created_at": cp.last_created_at,
+            "updated_at": datetime.now(timezone.utc),
+        },
+        upsert=True,
+    )
+
+
+def read_batches(
+    db: Session, cp: Checkpoint, batch_size: int = SYNC_BATCH_SIZE
+) -> Iterator[Sequence[Row]]:
+    """Keyset-page SQL rows after the checkpoint.
+
+    Rows are read as plain column tuples (no ORM identity map). With
+    ``mark="created_at"`` pages follow the (created_at, id) index so rows
+    sharing a timestamp are neither skipped nor repeated; rows whose
+    created_at is NULL have no place in that order and are skipped (sync
+    them with ``mark="id"``).
+    """
+    last_id: int = cp.last_id
+    last_ts: Optional[datetime] = cp.last_created_at
+    while True:
+        stmt: Select = select(
+            User.id, User.username, User.email, User.age, User.created_at
+        )
+        if cp.mark == "created_at":
+            stmt = stmt.where(User.created_at.is_not(None))
+            if last_ts is not None:
+                stmt = stmt.where(
+                    tuple_(User.created_at, User.id) > tuple_(last_ts, last_id)
+                )
+            stmt = stmt.order_by(User.created_at, User.id)
+        else:
+            # Legacy Column() attributes type comparisons as bool.
+            stmt = stmt.where(User.id > last_id)  # type: ignore[arg-type]
+            stmt = stmt.order_by(User.id)
+        rows = db.execute(stmt.limit(batch_size)).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_id, last_ts = rows[-1].id, rows[-1].created_at
+
+
+def to_mongo_op(row: Row) -> UpdateOne:
+    """Map a SQL users row onto the Mongo users document.
+
+    SQL owns username/email/age; tags, active and the rest of the profile
+    stay Mongo-owned and are only initialised on insert.
+    """
+    return UpdateOne(
+        by_username(row.username),
+        {
+            "$set": {
+                "email": row.email,
+                "profile.age": row.age,
+                "sql_id": row.id,
+            },
+            "$setOnInsert": {
+                "profile.full_name": row.username,
+                "profile.city": "",
+                "tags": [],
+                "active": True,
+            },
+        },
+        upsert=True,
+    )
+
+
+def sync_users(
+    db: Session,
+    target: Collection,
+    checkpoints: Collection,
+    mark: str = "id",
+    batch_size: int = SYNC_BATCH_SIZE,
+    full: bool = False,
+) -> SyncStats:
+    """Upsert SQL users added since the last checkpoint into Mongo.
+
+    The high-water mark only moves forward, so rows updated in place after
+    they were synced (e.g. by update_user_age) are not picked up again; run
+    with ``full=True`` to refresh them. The checkpoint is saved after every
+    acknowledged batch, so an interrupted run resumes at the last completed
+    page.
+    """
+    if mark not in ("id", "created_at"):
+        raise ValueError("mark must be 'id' or 'created_at'")
+    start = time.perf_counter()
+    cp = Checkpoint(mark=mark) if full else load_checkpoint(checkpoints, mark)
+    stats = SyncStats()
+    for rows in read_batches(db, cp, batch_size):
+        ops: List[UpdateOne] = [to_mongo_op(r) for r in rows]
+        res = target.bulk_write(ops, ordered=False)
+        stats.rows += len(rows)
+        stats.upserted += res.upserted_count
+        stats.modified += res.modified_count
+        stats.batches += 1
+        cp.last_id, cp.last_created_at = rows[-1].id, rows[-1].created_at
+        save_checkpoint(checkpoints, cp)
+    stats.seconds = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main() -> None:
+    from src.db_setup import SessionLocal
+    from src.mongo_pymongo import db as mongo_db
+
+    session = SessionLocal()
+    try:
+        stats = sync_users(
+            session,
+            mongo_db().get_collection("users"),
+            mongo_db().get_collection("sync_checkpoints"),
+        )
+    finally:
+        session.close()
+    print("sync:", asdict(stats))
+
+
+if __name__ == "__main__":
+    main()
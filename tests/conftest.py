@@ -0,0 +1,21 @@
+import inspect
+from typing import Any
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _mongomock_update_sort(monkeypatch: pytest.MonkeyPatch) -> None:
+    """mongomock 4.3 predates the ``sort`` argument pymongo>=4.11 passes."""
+    try:
+        from mongomock.collection import BulkOperationBuilder
+    except ImportError:
+        return
+    original = BulkOperationBuilder.add_update
+    if "sort" in inspect.signature(original).parameters:
+        return
+
+    def add_update(self: Any, *args: Any, sort: Any = None, **kwargs: Any) -> Any:
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(BulkOperationBuilder, "add_update", add_update)
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("mongomock")
+pytest.importorskip("pandas")
+
+from src.benchmark import AGE_MAX, AGE_MIN, BACKENDS, CITIES, age_band, run  # noqa: E402
+
+PHASES = ["load", "point_lookup", "city_scan", "bulk_insert", "update_mix"]
+
+
+def test_age_bands_split_the_age_range() -> None:
+    bands = [age_band(c) for c in CITIES]
+    assert bands[0][0] == AGE_MIN
+    assert bands[-1][1] == AGE_MAX
+    assert all(lo <= hi for lo, hi in bands)
+    assert all(a[1] + 1 == b[0] for a, b in zip(bands, bands[1:]))
+
+
+def test_run_smoke() -> None:
+    report = run(list(BACKENDS), n_users=50, n_ops=20, concurrency=4, bulk_size=10)
+
+    assert report["config"]["mongo"] == "mongomock"
+    assert report["config"]["serialized"] == ["pymongo", "mongoengine"]
+    assert list(report["backends"]) == list(BACKENDS)
+    for name, phases in report["backends"].items():
+        for phase in PHASES:
+            assert phases[phase]["ops"] > 0, (name, phase)
+            assert phases[phase]["peak_mem_bytes"] > 0, (name, phase)
+    assert "city_scan" in report["backends"]["sql"]["notes"]
@@ -0,0 +1,33 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from src.mongo_async import gather_bounded
+
+
+def test_gather_bounded_order_and_limit() -> None:
+    in_flight: List[int] = [0, 0]
+
+    async def fn(x: int) -> int:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        await asyncio.sleep(0.001 * (x % 3))
+        in_flight[0] -= 1
+        return x * 2
+
+    out = asyncio.run(gather_bounded(fn, iter(range(100)), limit=4))
+
+    assert out == [x * 2 for x in range(100)]
+    assert in_flight[1] <= 4
+
+
+def test_gather_bounded_propagates_errors() -> None:
+    async def fn(x: int) -> int:
+        if x == 5:
+            raise ValueError("boom")
+        await asyncio.sleep(0)
+        return x
+
+    with pytest.raises(ValueError):
+        asyncio.run(gather_bounded(fn, range(50), limit=3))
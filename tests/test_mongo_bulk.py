@@ -0,0 +1,118 @@
+from typing import Any, Dict, List
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from pymongo.errors import BulkWriteError  # noqa: E402
+
+from src.mongo_indexes import ensure_indexes  # noqa: E402
+from src.mongo_pymongo import bulk_create_users  # noqa: E402
+
+
+def _user(name: str) -> Dict[str, Any]:
+    return {
+        "username": name,
+        "email": f"{name}@example.com",
+        "full_name": name.title(),
+        "age": 30,
+        "city": "Berlin",
+    }
+
+
+@pytest.fixture
+def coll() -> Any:
+    c = mongomock.MongoClient().appdb.users
+    ensure_indexes(c)
+    return c
+
+
+def _ids_by_name(coll: Any) -> Dict[str, str]:
+    return {d["username"]: str(d["_id"]) for d in coll.find()}
+
+
+@pytest.mark.parametrize("upsert", [True, False])
+def test_ids_follow_input_order(coll: Any, upsert: bool) -> None:
+    names = ["a", "b", "c", "d", "e"]
+    res = bulk_create_users(
+        [_user(n) for n in names], batch_size=2, upsert=upsert, collection=coll
+    )
+
+    stored = _ids_by_name(coll)
+    assert res.ids == [stored[n] for n in names]
+    assert res.batches == 3
+    assert res.inserted == 5
+    assert res.duplicates == []
+
+
+@pytest.mark.parametrize("upsert", [True, False])
+def test_duplicates_within_and_across_batches(coll: Any, upsert: bool) -> None:
+    coll.insert_one({"username": "old", "email": "old@example.com"})
+    names: List[str] = ["a", "a", "old", "b", "a"]
+
+    res = bulk_create_users(
+        [_user(n) for n in names],
+        batch_size=3,
+        upsert=upsert,
+        collection=coll,
+    )
+
+    stored = _ids_by_name(coll)
+    assert res.inserted == 2
+    assert res.duplicates == ["a", "old", "a"]
+    # Repeats, in the same batch or a later one, reuse the _id without a lookup.
+    assert res.ids[:2] == [stored["a"], stored["a"]]
+    assert res.ids[2] is None
+    assert res.ids[3] == stored["b"]
+    assert res.ids[4] == stored["a"]
+    assert coll.count_documents({}) == 3
+
+
+@pytest.mark.parametrize("upsert", [True, False])
+def test_resolve_duplicates(coll: Any, upsert: bool) -> None:
+    coll.insert_one({"username": "old", "email": "old@example.com"})
+    stored_old = str(coll.find_one({"username": "old"})["_id"])
+
+    res = bulk_create_users(
+        [_user("old"), _user("new")],
+        upsert=upsert,
+        resolve_duplicates=True,
+        collection=coll,
+    )
+
+    assert res.ids == [stored_old, _ids_by_name(coll)["new"]]
+    assert res.duplicates == ["old"]
+
+
+def test_later_batch_repeat_is_not_looked_up(coll: Any, monkeypatch: Any) -> None:
+    lookups: List[Any] = []
+    find = coll.find
+    monkeypatch.setattr(
+        coll, "find", lambda *a, **kw: lookups.append(a) or find(*a, **kw)
+    )
+
+    res = bulk_create_users(
+        [_user("a"), _user("b"), _user("a")],
+        batch_size=2,
+        resolve_duplicates=True,
+        collection=coll,
+    )
+
+    assert lookups == []
+    assert res.ids[2] == res.ids[0] == _ids_by_name(coll)["a"]
+    assert res.duplicates == ["a"]
+
+
+def test_write_concern_error_is_raised(coll: Any, monkeypatch: Any) -> None:
+    details = {
+        "writeErrors": [],
+        "writeConcernErrors": [{"code": 64, "errmsg": "waiting for replication"}],
+        "upserted": [],
+    }
+
+    def bulk_write(*args: Any, **kwargs: Any) -> None:
+        raise BulkWriteError(details)
+
+    monkeypatch.setattr(coll, "bulk_write", bulk_write)
+    with pytest.raises(BulkWriteError):
+        bulk_create_users([_user("a")], collection=coll)
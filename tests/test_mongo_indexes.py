@@ -0,0 +1,58 @@
+from typing import Any, Dict
+
+import pytest
+
+from src.mongo_indexes import collscans, ensure_indexes, plan_stages
+
+IXSCAN: Dict[str, Any] = {"stage": "IXSCAN", "indexName": "username_1"}
+
+
+def test_plan_stages_nested_input_stage() -> None:
+    plan = {
+        "stage": "PROJECTION",
+        "inputStage": {"stage": "FETCH", "inputStage": IXSCAN},
+    }
+    assert plan_stages(plan) == ["PROJECTION", "FETCH", "IXSCAN"]
+
+
+def test_plan_stages_input_stages() -> None:
+    plan = {
+        "stage": "FETCH",
+        "inputStage": {
+            "stage": "OR",
+            "inputStages": [IXSCAN, {"stage": "COLLSCAN"}],
+        },
+    }
+    assert plan_stages(plan) == ["FETCH", "OR", "IXSCAN", "COLLSCAN"]
+
+
+def test_plan_stages_sbe_query_plan() -> None:
+    # SBE explain output wraps the classic tree in queryPlan next to slotBasedPlan.
+    plan = {
+        "queryPlan": {"stage": "FETCH", "planNodeId": 2, "inputStage": IXSCAN},
+        "slotBasedPlan": {"slots": "...", "stages": "..."},
+    }
+    assert plan_stages(plan) == ["FETCH", "IXSCAN"]
+
+
+def test_collscans() -> None:
+    plans = {
+        "by_username": plan_stages({"stage": "FETCH", "inputStage": IXSCAN}),
+        "by_email": plan_stages({"queryPlan": {"stage": "COLLSCAN"}}),
+    }
+    assert collscans(plans) == ["by_email"]
+    assert collscans({}) == []
+
+
+def test_ensure_indexes_is_idempotent() -> None:
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().appdb.users
+
+    first = ensure_indexes(coll)
+    indexes = coll.index_information()
+    assert ensure_indexes(coll) == first
+    assert coll.index_information() == indexes
+    assert indexes["username_1"]["unique"] is True
+    assert {"profile.city_1", "profile.city_1_active_1", "profile.city_1__id_1"} <= set(
+        indexes
+    )
@@ -0,0 +1,72 @@
+from typing import Any
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from pymongo.errors import AutoReconnect  # noqa: E402
+
+from src.mongo_mutations import MutationBatcher  # noqa: E402
+
+
+@pytest.fixture
+def coll() -> Any:
+    c = mongomock.MongoClient().appdb.users
+    c.insert_many(
+        [
+            {"username": "alice", "tags": ["a"], "profile": {"city": "Berlin"}},
+            {"username": "bob", "tags": [], "profile": {"city": "Bremen"}},
+        ]
+    )
+    return c
+
+
+def test_coalesces_and_counts(coll: Any) -> None:
+    with MutationBatcher(coll) as b:
+        b.add_tag("alice", "a")
+        b.add_tag("bob", "x")
+        b.add_tag("bob", "y")
+        b.update_city("bob", "Kiel")
+        b.deactivate_user("bob")
+        b.add_tag("ghost", "x")
+
+    assert b.modified == {"alice": 0, "bob": 1, "ghost": 0}
+    bob = coll.find_one({"username": "bob"})
+    assert bob["tags"] == ["x", "y"]
+    assert bob["profile"]["city"] == "Kiel"
+    assert bob["active"] is False
+
+
+def test_noop_by_read_is_still_sent(coll: Any) -> None:
+    b = MutationBatcher(coll)
+    b.add_tag("alice", "a")
+    real_find = coll.find
+
+    def find(*args: Any, **kwargs: Any) -> Any:
+        docs = list(real_find(*args, **kwargs))
+        # Another writer removes the tag after the read.
+        coll.update_one({"username": "alice"}, {"$pull": {"tags": "a"}})
+        return iter(docs)
+
+    coll.find = find
+    assert b.flush() == {"alice": 0}
+    coll.find = real_find
+    assert coll.find_one({"username": "alice"})["tags"] == ["a"]
+
+
+def test_failed_write_requeues(coll: Any) -> None:
+    b = MutationBatcher(coll)
+    b.add_tag("bob", "x")
+    real_bulk_write = coll.bulk_write
+
+    def bulk_write(*args: Any, **kwargs: Any) -> None:
+        raise AutoReconnect("down")
+
+    coll.bulk_write = bulk_write
+    with pytest.raises(AutoReconnect):
+        b.flush()
+    assert b.modified == {}
+
+    coll.bulk_write = real_bulk_write
+    assert b.flush() == {"bob": 1}
+    assert coll.find_one({"username": "bob"})["tags"] == ["x"]
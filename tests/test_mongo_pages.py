@@ -0,0 +1,115 @@
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from mongoengine import connect, disconnect  # noqa: E402
+
+from src import mongo_mongoengine, mongo_pymongo  # noqa: E402
+from src.mongo_pymongo import user_doc  # noqa: E402
+
+NAMES = [f"u{i}" for i in range(7)]
+
+
+def _seed(coll: Any) -> List[Any]:
+    docs = [
+        user_doc(n, f"{n}@example.com", n.title(), 20 + i, ("Berlin", "Paris")[i % 2])
+        for i, n in enumerate(NAMES)
+    ]
+    return list(coll.insert_many(docs).inserted_ids)
+
+
+@pytest.fixture
+def pymongo_ids(monkeypatch: Any) -> List[Any]:
+    coll = mongomock.MongoClient().appdb.users
+    monkeypatch.setattr(mongo_pymongo, "users", lambda: coll)
+    return _seed(coll)
+
+
+@pytest.fixture
+def mongoengine_ids() -> Iterator[List[Any]]:
+    disconnect(alias="default")
+    connect(
+        "appdb",
+        host="mongodb://localhost",
+        alias="default",
+        mongo_client_class=mongomock.MongoClient,
+        uuidRepresentation="standard",
+    )
+    try:
+        yield _seed(mongo_mongoengine.User._get_collection())
+    finally:
+        disconnect(alias="default")
+
+
+def _ids(pages: Iterator[List[Dict[str, Any]]]) -> List[List[Any]]:
+    return [[d["_id"] for d in page] for page in pages]
+
+
+def test_pymongo_page_boundaries_and_resume(pymongo_ids: List[Any]) -> None:
+    ids = pymongo_ids
+    assert _ids(mongo_pymongo.iter_user_pages(page_size=3)) == [
+        ids[0:3],
+        ids[3:6],
+        ids[6:7],
+    ]
+    # An exact multiple ends with one empty read and no empty page.
+    assert _ids(mongo_pymongo.iter_user_pages(page_size=7)) == [ids]
+    assert _ids(mongo_pymongo.iter_user_pages(page_size=3, after_id=ids[2])) == [
+        ids[3:6],
+        ids[6:7],
+    ]
+    with pytest.raises(ValueError):
+        next(mongo_pymongo.iter_user_pages(page_size=0))
+
+
+def test_pymongo_id_filter_is_anded(pymongo_ids: List[Any]) -> None:
+    ids = pymongo_ids
+    query = {"_id": {"$in": [ids[1], ids[2], ids[5]]}}
+    pages = mongo_pymongo.iter_user_pages(query, page_size=2, after_id=ids[1])
+    assert _ids(pages) == [[ids[2], ids[5]]]
+    city = mongo_pymongo.iter_user_pages({"profile.city": "Berlin"}, page_size=3)
+    assert _ids(city) == [[ids[0], ids[2], ids[4]], [ids[6]]]
+
+
+def test_pymongo_projections(pymongo_ids: List[Any]) -> None:
+    (page,) = mongo_pymongo.iter_user_pages(
+        projection={"_id": 0, "username": 1}, page_size=10
+    )
+    assert page[0] == {"_id": pymongo_ids[0], "username": "u0"}
+
+    (page,) = mongo_pymongo.iter_user_pages(projection={"_id": 0}, page_size=10)
+    assert page[0]["_id"] == pymongo_ids[0]
+    assert page[0]["email"] == "u0@example.com"
+
+    (page,) = mongo_pymongo.iter_user_pages(
+        projection={"profile": 0, "tags": 0}, page_size=10
+    )
+    assert set(page[0]) == {"_id", "username", "email", "active"}
+
+
+def test_mongoengine_page_boundaries_and_resume(mongoengine_ids: List[Any]) -> None:
+    ids = mongoengine_ids
+    assert _ids(mongo_mongoengine.iter_user_pages(page_size=3)) == [
+        ids[0:3],
+        ids[3:6],
+        ids[6:7],
+    ]
+    assert _ids(mongo_mongoengine.iter_user_pages(page_size=3, after_id=ids[2])) == [
+        ids[3:6],
+        ids[6:7],
+    ]
+
+
+def test_mongoengine_filters_and_fields(mongoengine_ids: List[Any]) -> None:
+    ids = mongoengine_ids
+    pages = mongo_mongoengine.iter_user_pages(
+        page_size=2, after_id=ids[1], id__in=[ids[1], ids[2], ids[5]]
+    )
+    assert _ids(pages) == [[ids[2], ids[5]]]
+
+    (page,) = mongo_mongoengine.iter_user_pages(
+        fields=("username",), page_size=10, profile__city="Paris"
+    )
+    assert page == [{"_id": ids[i], "username": NAMES[i]} for i in (1, 3, 5)]
@@ -0,0 +1,110 @@
+import logging
+from typing import Any, Iterator
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.sql_instrumentation import (
+    QueryInstrumentation,
+    fingerprint,
+    instrument,
+    percentile,
+)
+
+
+@pytest.fixture
+def engine() -> Iterator[Engine]:
+    e = create_engine("sqlite://")
+    yield e
+    e.dispose()
+
+
+def _stats(instr: QueryInstrumentation, statement: str) -> Any:
+    return next(q for q in instr.snapshot()["queries"] if q["statement"] == statement)
+
+
+def test_fingerprint_normalizes_literals_and_in_lists() -> None:
+    assert fingerprint("SELECT * FROM users WHERE name = 'o''brien' AND age > 30") == (
+        "SELECT * FROM users WHERE name = ? AND age > ?"
+    )
+    assert fingerprint("SELECT id FROM users\n  WHERE id IN (?, ?, ?)") == (
+        "SELECT id FROM users WHERE id IN (?)"
+    )
+    assert fingerprint("SELECT id FROM t WHERE a = %(a_1)s OR b = :b") == (
+        "SELECT id FROM t WHERE a = ? OR b = ?"
+    )
+
+
+def test_percentile() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile([], 50) == 0.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile(values, 50) == 51.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 100) == 100.0
+
+
+def test_slow_query_log_redacts_binds(
+    engine: Engine, caplog: pytest.LogCaptureFixture
+) -> None:
+    instr = instrument(engine, slow_query_ms=0.0)
+    with caplog.at_level(logging.WARNING, logger="src.sql_instrumentation"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+
+    assert "slow query" in caplog.text
+    assert "<str>" in caplog.text
+    assert "hunter2" not in caplog.text
+    stats = _stats(instr, "SELECT ?")
+    assert (stats["count"], stats["slow"], stats["errors"]) == (1, 1, 0)
+    instr.uninstall()
+
+
+def test_n_plus_one_at_threshold_within_session(
+    engine: Engine, caplog: pytest.LogCaptureFixture
+) -> None:
+    instr = instrument(engine, n_plus_one_threshold=3)
+    with caplog.at_level(logging.WARNING, logger="src.sql_instrumentation"):
+        with Session(engine) as session:
+            for i in range(2):
+                session.execute(text("SELECT :x"), {"x": i})
+            assert instr.snapshot()["n_plus_one"] == []
+            for i in range(3):
+                session.execute(text("SELECT :x"), {"x": i})
+
+    assert instr.snapshot()["n_plus_one"] == [{"statement": "SELECT ?", "count": 3}]
+    assert caplog.text.count("possible N+1") == 1
+    instr.uninstall()
+
+
+def test_failed_statement_counts_error(engine: Engine) -> None:
+    instr = instrument(engine)
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert not conn.info.get("_instr_start")
+
+    stats = _stats(instr, "SELECT * FROM missing_table")
+    assert (stats["count"], stats["errors"]) == (1, 1)
+    instr.uninstall()
+
+
+def test_uninstall_removes_every_listener(engine: Engine) -> None:
+    instr = instrument(engine)
+    instr.uninstall()
+
+    for name, fn in [
+        ("before_cursor_execute", instr._before),
+        ("after_cursor_execute", instr._after),
+        ("handle_error", instr._error),
+        ("checkin", instr._checkin),
+    ]:
+        assert not event.contains(engine, name, fn)
+    assert not event.contains(Session, "after_begin", instr._bind_session)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert instr.snapshot()["queries"] == []
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any, Iterator
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from sqlalchemy import create_engine, insert, update  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.orm_models import Base, User  # noqa: E402
+from src.sql_mongo_sync import sync_users  # noqa: E402
+
+T1 = datetime(2024, 1, 1)
+T2 = datetime(2024, 1, 2)
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def mongo() -> Any:
+    return mongomock.MongoClient().appdb
+
+
+def _add(db: Session, *rows: Any) -> None:
+    db.execute(
+        insert(User),
+        [
+            {"username": name, "email": f"{name}@example.com", "age": 30, **extra}
+            for name, extra in rows
+        ],
+    )
+    db.commit()
+
+
+def test_id_mark_only_moves_deltas(db: Session, mongo: Any) -> None:
+    _add(db, *[(f"u{i}", {}) for i in range(5)])
+
+    first = sync_users(db, mongo.users, mongo.sync_checkpoints, batch_size=2)
+    _add(db, ("u5", {}))
+    second = sync_users(db, mongo.users, mongo.sync_checkpoints, batch_size=2)
+
+    assert (first.rows, first.batches, first.upserted) == (5, 3, 5)
+    assert (second.rows, second.upserted) == (1, 1)
+    assert mongo.users.count_documents({}) == 6
+    assert mongo.users.find_one({"username": "u0"})["profile"]["age"] == 30
+
+
+def test_created_at_mark_ties_and_nulls(db: Session, mongo: Any) -> None:
+    _add(
+        db,
+        ("a", {"created_at": T1}),
+        ("b", {"created_at": T1}),
+        ("c", {"created_at": T1}),
+        ("n", {"created_at": None}),
+        ("d", {"created_at": T2}),
+    )
+    db.execute(update(User).where(User.username == "n").values(created_at=None))
+    db.commit()
+
+    stats = sync_users(
+        db, mongo.users, mongo.sync_checkpoints, mark="created_at", batch_size=2
+    )
+
+    assert stats.rows == 4
+    assert sorted(d["username"] for d in mongo.users.find()) == ["a", "b", "c", "d"]
+    cp = mongo.sync_checkpoints.find_one()
+    assert cp["last_created_at"] == T2